@@ -2,7 +2,7 @@ import os
 
 from agents import Agent
 
-from code_conversion.tools import check_python_code
+from code_conversion.tools import check_python_code, check_python_code_compact
 
 INSTRUCTIONS = """
 You are a code-conversion agent. Your task is to take code written in any programming language and convert it into valid Python code that maintains the original logic and structure as closely as possible.
@@ -26,9 +26,45 @@ don't put formatting around it, don't explain that it's correct, etc.)
 Return only the final, syntactically correct Python code.  Never include markdown, backticks, or other formatting in your output.
 """
 
-coding_agent = Agent(
-    name="Python Conversion Agent",
-    instructions=INSTRUCTIONS,
-    model=os.environ["OPENAI_MODEL_NAME"],
-    tools=[check_python_code],
-)
+# "compact" returns structured, deduplicated diagnostics instead of raw Ruff output
+CHECK_PYTHON_CODE_TOOLS = {
+    "full": check_python_code,
+    "compact": check_python_code_compact,
+}
+
+
+def diagnostics_mode() -> str:
+    """Return the validated `CHECK_PYTHON_CODE_DIAGNOSTICS` mode.
+
+    Read on each call rather than at import, so a value loaded from `.env`
+    after this module is imported is still picked up.
+    """
+    mode = os.getenv("CHECK_PYTHON_CODE_DIAGNOSTICS", "full")
+    if mode not in CHECK_PYTHON_CODE_TOOLS:
+        raise ValueError(
+            f"Invalid CHECK_PYTHON_CODE_DIAGNOSTICS={mode!r}; "
+            f"expected one of {', '.join(CHECK_PYTHON_CODE_TOOLS)}"
+        )
+    return mode
+
+
+def build_coding_agent(
+    model: str, instructions: str = INSTRUCTIONS, tools: list | None = None
+) -> Agent:
+    return Agent(
+        name="Python Conversion Agent",
+        instructions=instructions,
+        model=model,
+        tools=tools or [CHECK_PYTHON_CODE_TOOLS[diagnostics_mode()]],
+    )
+
+
+def __getattr__(name: str):
+    # Build the default agent on first access rather than on import, so scripts
+    # that only need INSTRUCTIONS or build_coding_agent (push_prompts.py,
+    # matrix_code_conversion.py) don't require OPENAI_MODEL_NAME to be set.
+    if name == "coding_agent":
+        agent = build_coding_agent(os.environ["OPENAI_MODEL_NAME"])
+        globals()["coding_agent"] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,215 @@
+"""A local OpenAI-compatible chat completions server for offline benchmarks.
+
+The server is stateless per request: it inspects the conversation it is sent and
+either asks the agent to call `check_python_code` or returns the code from the
+last tool call as the final answer. Responses are scripted from a mapping of
+prompt -> Python code, with an optional per-request latency to mimic a remote
+model.
+
+The scripted model only repairs broken code when the last tool result points at
+an error (a rule code and a line); otherwise it resubmits the same code until it
+runs out of tool rounds. Success rates therefore reflect whether the diagnostics
+returned by the tool are usable, not just how the script was configured.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+from code_conversion.tools import count_tokens
+
+TOOL_NAME = "check_python_code"
+BROKEN_SUFFIX = "\ndef broken(:\n    return ("
+
+# Tool results reach the model as text, either JSON or the pydantic repr
+_PASSED = re.compile(r"return_code\W{0,3}0\b")
+# Compact diagnostics: code='F821', line=3 (or the JSON equivalent)
+_COMPACT_ERROR = re.compile(r"code\W{1,4}[\w-]+\W+line\W{1,3}[1-9]")
+# Full Ruff output: "F821 Undefined name" or "invalid-syntax: ..." then " --> f.py:3:1"
+_FULL_ERROR = re.compile(
+    r"(?:[A-Z]+\d+|[a-z]+(?:-[a-z]+)+):?\s.{0,300}?-->\s*\S+?:[1-9]\d*:\d+",
+    re.DOTALL,
+)
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content)
+    text = content
+    for tool_call in message.get("tool_calls") or []:
+        text += tool_call["function"]["arguments"]
+    return text
+
+
+def _locates_error(tool_result: str) -> bool:
+    """Whether a failing tool result names an error code and its line."""
+    return bool(_COMPACT_ERROR.search(tool_result) or _FULL_ERROR.search(tool_result))
+
+
+class FakeModelServer:
+    """Serve scripted chat completions on a background thread.
+
+    Args:
+        completions: Maps a user prompt to the Python code the fake model emits.
+        default_completion: Code emitted for prompts missing from `completions`.
+        latency: Seconds to sleep before answering each request.
+        tool_rounds: Maximum number of `check_python_code` calls per row; the
+            code from the last call is returned once a check passes or the
+            rounds run out.
+        broken_rounds: Number of initial tool calls that send code with a syntax
+            error, so the agent sees (and pays for) failing diagnostics. Later
+            calls only send the fixed code if the previous result located the
+            error.
+    """
+
+    def __init__(
+        self,
+        completions: dict[str, str] | None = None,
+        default_completion: str = "pass",
+        latency: float = 0.0,
+        tool_rounds: int = 1,
+        broken_rounds: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.completions = completions or {}
+        self.default_completion = default_completion
+        self.latency = latency
+        self.tool_rounds = tool_rounds
+        self.broken_rounds = broken_rounds
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> Self:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_usage(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def respond(self, body: dict) -> dict:
+        """Build the chat completion for a request body."""
+        messages = body.get("messages", [])
+        tool_results = [m for m in messages if m.get("role") == "tool"]
+        prompt_tokens = sum(count_tokens(_message_text(m)) for m in messages)
+
+        last_result = _message_text(tool_results[-1]) if tool_results else ""
+        if tool_results and (
+            _PASSED.search(last_result) or len(tool_results) >= self.tool_rounds
+        ):
+            message = {"role": "assistant", "content": self._last_tool_input(messages)}
+            finish_reason = "stop"
+        else:
+            if not tool_results:
+                user_messages = [m for m in messages if m.get("role") == "user"]
+                prompt = _message_text(user_messages[-1]) if user_messages else ""
+                code = self.completions.get(prompt, self.default_completion)
+                if self.broken_rounds:
+                    code += BROKEN_SUFFIX
+            else:
+                code = self._last_tool_input(messages)
+                if len(tool_results) >= self.broken_rounds and _locates_error(
+                    last_result
+                ):
+                    code = code.removesuffix(BROKEN_SUFFIX)
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{uuid.uuid4().hex[:24]}",
+                        "type": "function",
+                        "function": {
+                            "name": TOOL_NAME,
+                            "arguments": json.dumps({"input": code}),
+                        },
+                    }
+                ],
+            }
+            finish_reason = "tool_calls"
+
+        completion_tokens = count_tokens(_message_text(message))
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": finish_reason}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def _last_tool_input(messages: list[dict]) -> str:
+        for message in reversed(messages):
+            for tool_call in message.get("tool_calls") or []:
+                if tool_call["function"]["name"] == TOOL_NAME:
+                    return json.loads(tool_call["function"]["arguments"])["input"]
+        return ""
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404, "Only /chat/completions is supported")
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if server.latency:
+                    time.sleep(server.latency)
+
+                payload = json.dumps(server.respond(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,347 @@
+"""Offline benchmarks for the code_conversion pipeline.
+
+Micro-benchmarks time `run_ruff`, `run_ruff_compact`, `is_valid_python` and
+`RuffOutput` serialization. Macro-benchmarks run the full agent task against a
+local fake model server (see `fake_server.py`) over synthetic datasets, so no
+OpenAI calls are made. Each macro run is repeated per `check_python_code`
+diagnostics mode to compare prompt tokens per row, latency and success rate.
+
+Results are compared against a JSON baseline and the run fails if any timing or
+prompt-token count grows by more than `--threshold`, or if a valid rate drops.
+
+Usage:
+    python -m code_conversion.benchmarks.run_benchmarks
+    python -m code_conversion.benchmarks.run_benchmarks --rows 100,1000,10000
+    python -m code_conversion.benchmarks.run_benchmarks --broken-rounds 2
+    python -m code_conversion.benchmarks.run_benchmarks --update-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from code_conversion.benchmarks.fake_server import FakeModelServer
+from code_conversion.tools import (
+    RuffOutput,
+    count_tokens,
+    is_valid_python,
+    run_ruff,
+    run_ruff_compact,
+)
+
+BENCHMARKS_DIR = Path(__file__).parent
+DATA_PATH = BENCHMARKS_DIR.parent / "data.json"
+DEFAULT_BASELINE_PATH = BENCHMARKS_DIR / "baselines.json"
+
+# Non-timing metrics checked for regressions. Token counts are compared with
+# the same threshold as timings; the fake model is deterministic, so any drop in
+# the valid rate is a regression.
+HIGHER_IS_WORSE_METRICS = ("prompt_tokens_per_row",)
+LOWER_IS_WORSE_METRICS = ("valid_rate",)
+
+# Settings that change what the timings mean; baselines recorded with different
+# values are not comparable. Row counts and diagnostics modes only add or remove
+# metrics, which are matched by name.
+COMPARABLE_CONFIG_KEYS = (
+    "iterations",
+    "latency",
+    "tool_rounds",
+    "broken_rounds",
+    "concurrency",
+)
+
+VALID_SAMPLE = "def add(a, b):\n    return a + b\n\n\nresult = add(1, 2)\n"
+INVALID_SAMPLE = "def add(a, b)\n    return a + b\n\nresult = add(1, 2\n"
+
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+    }
+
+
+def _time_calls(fn: Callable[[], object], iterations: int) -> dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _summarize(samples)
+
+
+def run_micro_benchmarks(iterations: int) -> dict[str, dict[str, float]]:
+    ruff_output = run_ruff(INVALID_SAMPLE)
+    ruff_json = ruff_output.model_dump_json()
+
+    return {
+        "run_ruff.valid": _time_calls(lambda: run_ruff(VALID_SAMPLE), iterations),
+        "run_ruff.invalid": _time_calls(lambda: run_ruff(INVALID_SAMPLE), iterations),
+        "run_ruff_compact.invalid": _time_calls(
+            lambda: run_ruff_compact(INVALID_SAMPLE), iterations
+        ),
+        "tool_output_tokens": {
+            "full": count_tokens(ruff_output.model_dump_json()),
+            "compact": count_tokens(run_ruff_compact(INVALID_SAMPLE).model_dump_json()),
+        },
+        "is_valid_python": _time_calls(
+            lambda: is_valid_python(VALID_SAMPLE), iterations
+        ),
+        "ruff_output.dump_json": _time_calls(
+            lambda: ruff_output.model_dump_json(), iterations * 100
+        ),
+        "ruff_output.validate_json": _time_calls(
+            lambda: RuffOutput.model_validate_json(ruff_json), iterations * 100
+        ),
+    }
+
+
+def build_dataset(rows: int) -> list[dict[str, str]]:
+    """Cycle through data.json, making each input unique so nothing is cached."""
+    with open(DATA_PATH, "r") as f:
+        examples = json.load(f)
+
+    return [
+        {
+            "input": f"{examples[i % len(examples)]['input']}\n// row {i}",
+            "expected": examples[i % len(examples)]["expected"],
+        }
+        for i in range(rows)
+    ]
+
+
+def configure_fake_client(server: FakeModelServer) -> None:
+    from agents import (
+        set_default_openai_api,
+        set_default_openai_client,
+        set_tracing_disabled,
+    )
+    from openai import AsyncOpenAI
+
+    set_default_openai_api("chat_completions")
+    set_default_openai_client(
+        AsyncOpenAI(base_url=server.base_url, api_key="fake", max_retries=0),
+        use_for_tracing=False,
+    )
+    set_tracing_disabled(True)
+
+
+async def run_task_over_dataset(
+    task: Callable, dataset: list[dict[str, str]], concurrency: int
+) -> dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    task_samples: list[float] = []
+    score_samples: list[float] = []
+    valid = 0
+
+    async def run_row(row: dict[str, str]) -> None:
+        nonlocal valid
+        async with semaphore:
+            start = time.perf_counter()
+            output = await task(row["input"])
+            task_samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            valid += is_valid_python(output)
+            score_samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_row(row) for row in dataset))
+    wall_s = time.perf_counter() - start
+
+    task_stats = _summarize(task_samples)
+    score_stats = _summarize(score_samples)
+    return {
+        "wall_s": wall_s,
+        "ms_per_row": wall_s / len(dataset) * 1000,
+        "task.median_ms": task_stats["median_ms"],
+        "task.p95_ms": task_stats["p95_ms"],
+        "score.median_ms": score_stats["median_ms"],
+        "valid_rate": valid / len(dataset),
+    }
+
+
+def run_macro_benchmarks(
+    row_counts: list[int],
+    latency: float,
+    tool_rounds: int,
+    broken_rounds: int,
+    concurrency: int,
+    diagnostics_modes: list[str],
+) -> dict[str, dict[str, float]]:
+    os.environ.setdefault("OPENAI_MODEL_NAME", "gpt-4o")
+
+    from agents import Runner
+
+    from code_conversion.agents import CHECK_PYTHON_CODE_TOOLS, build_coding_agent
+
+    tool_rounds = max(tool_rounds, broken_rounds + 1)
+    results = {}
+    for rows in row_counts:
+        dataset = build_dataset(rows)
+        completions = {row["input"]: row["expected"] for row in dataset}
+        for mode in diagnostics_modes:
+            agent = build_coding_agent(
+                os.environ["OPENAI_MODEL_NAME"], tools=[CHECK_PYTHON_CODE_TOOLS[mode]]
+            )
+
+            async def task(input: str, agent=agent) -> str:
+                result = await Runner.run(agent, input)
+                return result.final_output
+
+            with FakeModelServer(
+                completions=completions,
+                latency=latency,
+                tool_rounds=tool_rounds,
+                broken_rounds=broken_rounds,
+            ) as server:
+                configure_fake_client(server)
+                stats = asyncio.run(run_task_over_dataset(task, dataset, concurrency))
+                stats["prompt_tokens_per_row"] = server.prompt_tokens / rows
+            results[f"task.rows_{rows}.{mode}"] = stats
+    return results
+
+
+def config_mismatches(results: dict, baseline: dict) -> list[tuple[str, Any, Any]]:
+    """Return (setting, baseline, current) for comparable settings that differ."""
+    current = results.get("config", {})
+    previous = baseline.get("config", {})
+    return [
+        (key, previous.get(key), current.get(key))
+        for key in COMPARABLE_CONFIG_KEYS
+        if previous.get(key) != current.get(key)
+    ]
+
+
+def find_regressions(
+    results: dict, baseline: dict, threshold: float
+) -> list[tuple[str, float, float]]:
+    """Return (metric, baseline, current) for metrics that got worse.
+
+    Timings (`*_ms`, `*_s`) and prompt tokens per row regress when they grow by
+    more than the threshold; the valid rate regresses on any drop.
+    """
+    regressions = []
+    for section in ("micro", "macro"):
+        for name, metrics in results.get(section, {}).items():
+            baseline_metrics = baseline.get(section, {}).get(name, {})
+            for metric, current in metrics.items():
+                if metric not in baseline_metrics:
+                    continue
+                previous = baseline_metrics[metric]
+                if metric.endswith(("_ms", "_s")) or metric in HIGHER_IS_WORSE_METRICS:
+                    regressed = previous > 0 and current > previous * (1 + threshold)
+                elif metric in LOWER_IS_WORSE_METRICS:
+                    regressed = current < previous
+                else:
+                    continue
+                if regressed:
+                    regressions.append(
+                        (f"{section}.{name}.{metric}", previous, current)
+                    )
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    for section in ("micro", "macro"):
+        print(f"\n{section.title()} benchmarks:")
+        for name, metrics in results.get(section, {}).items():
+            formatted = ", ".join(f"{k}={v:.3f}" for k, v in metrics.items())
+            print(f"  {name:<32} {formatted}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark code_conversion offline")
+    parser.add_argument(
+        "--rows",
+        type=str,
+        default="100,1000",
+        help="Comma separated synthetic dataset sizes (e.g. 100,1000,10000)",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tool-rounds", type=int, default=1)
+    parser.add_argument(
+        "--broken-rounds",
+        type=int,
+        default=1,
+        help="Tool calls per row that send invalid code before the valid answer",
+    )
+    parser.add_argument(
+        "--diagnostics",
+        type=str,
+        default="full,compact",
+        help="Comma separated check_python_code diagnostics modes to compare",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--skip-macro", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {
+        "config": {
+            "rows": args.rows,
+            "iterations": args.iterations,
+            "latency": args.latency,
+            "tool_rounds": args.tool_rounds,
+            "broken_rounds": args.broken_rounds,
+            "diagnostics": args.diagnostics,
+            "concurrency": args.concurrency,
+        },
+        "micro": run_micro_benchmarks(args.iterations),
+    }
+    if not args.skip_macro:
+        row_counts = [int(rows) for rows in args.rows.split(",") if rows]
+        results["macro"] = run_macro_benchmarks(
+            row_counts,
+            args.latency,
+            args.tool_rounds,
+            args.broken_rounds,
+            args.concurrency,
+            [mode for mode in args.diagnostics.split(",") if mode],
+        )
+
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"\nWrote baseline to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    mismatches = config_mismatches(results, baseline)
+    if mismatches:
+        print(f"\nRun config differs from {args.baseline}; refusing to compare:")
+        for key, previous, current in mismatches:
+            print(f"  {key}: {previous} -> {current}")
+        print("Re-run with the baseline's settings or pass --update-baseline.")
+        return 2
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for metric, previous, current in regressions:
+            print(f"  {metric}: {previous:.3f} -> {current:.3f}")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
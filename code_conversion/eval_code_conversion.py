@@ -5,7 +5,13 @@ from braintrust import Eval, init_dataset
 from braintrust.wrappers.openai import BraintrustTracingProcessor
 from dotenv import load_dotenv
 
-from code_conversion.agents import coding_agent
+from code_conversion import tools
+from code_conversion.agents import INSTRUCTIONS, build_coding_agent, diagnostics_mode
+from code_conversion.incremental import (
+    DEFAULT_INDEX_PATH,
+    EvalIndex,
+    eval_context_fingerprint,
+)
 from code_conversion.tools import is_valid_python
 
 load_dotenv()
@@ -15,6 +21,13 @@ set_trace_processors([BraintrustTracingProcessor()])
 
 PROJECT_NAME = os.getenv("BRAINTRUST_PROJECT_NAME")
 DATASET_NAME = os.getenv("BRAINTRUST_DATASET_NAME")
+MODEL_NAME = os.environ["OPENAI_MODEL_NAME"]
+INCREMENTAL = os.getenv("INCREMENTAL_EVAL", "").lower() in ("1", "true", "yes")
+INDEX_PATH = os.getenv("EVAL_INDEX_PATH", DEFAULT_INDEX_PATH)
+DIAGNOSTICS = diagnostics_mode()
+
+# Built after load_dotenv() so settings from .env apply to the agent
+coding_agent = build_coding_agent(MODEL_NAME)
 
 
 async def task(input: str) -> str:
@@ -22,11 +35,30 @@ async def task(input: str) -> str:
     return result.final_output
 
 
+data = init_dataset(PROJECT_NAME, DATASET_NAME)
+scores = [is_valid_python]
+metadata = {"model": MODEL_NAME, "diagnostics": DIAGNOSTICS}
+
+if INCREMENTAL:
+    # Only run rows whose fingerprint changed since a previous experiment
+    index = EvalIndex(INDEX_PATH)
+    context = eval_context_fingerprint(
+        INSTRUCTIONS, MODEL_NAME, tools, scores, {"diagnostics": DIAGNOSTICS}
+    )
+    data = index.build_data(data, context, scores)
+    reused_rows = sum(row["metadata"]["reused"] for row in data)
+    print(f"Incremental eval: reusing {reused_rows} of {len(data)} rows")
+
+    task = index.wrap_task(task)
+    scores = [index.wrap_scorer(scorer) for scorer in scores]
+    metadata.update({"incremental": True, "reused_rows": reused_rows})
+
+
 Eval(
     PROJECT_NAME,
-    data=init_dataset(PROJECT_NAME, DATASET_NAME),
+    data=data,
     task=task,
-    scores=[is_valid_python],
+    scores=scores,
     experiment_name="Code Conversion",
-    metadata={"model": os.environ["OPENAI_MODEL_NAME"]},
+    metadata=metadata,
 )
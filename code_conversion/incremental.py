@@ -0,0 +1,220 @@
+"""Incremental evaluation: reuse results from previous experiments.
+
+Each dataset row is fingerprinted by its input and expected value together with
+everything that can change the result: the agent instructions, the model, the
+tool code, the scorers and the installed Ruff version. Outputs and scores are kept in a local append-only
+JSONL index keyed by fingerprint, and only rows whose fingerprint is missing are
+executed. Reused rows are carried into the new experiment with
+`metadata["reused"] = True` and a `reused` tag.
+"""
+
+import hashlib
+import inspect
+import json
+import subprocess
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / ".eval_cache" / "index.jsonl"
+
+
+def _sha256(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def ruff_version() -> str:
+    """Version of the `ruff` binary used by the tools and scorers."""
+    result = subprocess.run(
+        ["ruff", "--version"], capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip()
+
+
+def _serialize_score(name: str, score: Any) -> Any:
+    """Convert a scorer return value into something the JSONL index can store."""
+    if score is None or isinstance(score, (bool, int, float)):
+        return score
+    if hasattr(score, "score"):
+        # braintrust.Score
+        serialized = {
+            "__score__": True,
+            "name": getattr(score, "name", name),
+            "score": score.score,
+            "metadata": getattr(score, "metadata", None) or {},
+        }
+    else:
+        raise TypeError(
+            f"Scorer {name!r} returned {type(score).__name__}; incremental eval "
+            "only supports numbers, booleans, None and braintrust.Score"
+        )
+    try:
+        json.dumps(serialized)
+    except TypeError as e:
+        raise TypeError(f"Scorer {name!r} returned non-JSON metadata: {e}") from e
+    return serialized
+
+
+def _deserialize_score(score: Any) -> Any:
+    if isinstance(score, dict) and score.get("__score__"):
+        from braintrust import Score
+
+        return Score(
+            name=score["name"], score=score["score"], metadata=score["metadata"]
+        )
+    return score
+
+
+def eval_context_fingerprint(
+    instructions: str,
+    model: str,
+    tools_module: ModuleType,
+    scorers: list[Callable],
+    settings: dict[str, Any] | None = None,
+) -> str:
+    """Fingerprint everything shared by all rows of an evaluation.
+
+    `settings` holds any other options that change outputs (e.g. the
+    diagnostics mode of the check_python_code tool).
+    """
+    return _sha256(
+        {
+            "instructions": instructions,
+            "model": model,
+            "tools": inspect.getsource(tools_module),
+            "scorers": {s.__name__: inspect.getsource(s) for s in scorers},
+            "settings": settings or {},
+            "ruff": ruff_version(),
+        }
+    )
+
+
+def dataset_origin(dataset_id: str | None, row: dict) -> dict | None:
+    """Reference to the dataset record an eval case was built from.
+
+    Braintrust only links cases to their dataset (and its version) when `data`
+    is the `Dataset` itself, so cases rebuilt from its rows set `origin`.
+    """
+    if not dataset_id or not row.get("id") or not row.get("_xact_id"):
+        return None
+    return {
+        "object_type": "dataset",
+        "object_id": dataset_id,
+        "id": row["id"],
+        "_xact_id": row["_xact_id"],
+    }
+
+
+def fingerprint_row(input: Any, expected: Any, context: str) -> str:
+    return _sha256({"context": context, "input": input, "expected": expected})
+
+
+class EvalIndex:
+    """Local index of fingerprint -> output and scores from previous runs."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                entry = self.entries.setdefault(
+                    record["fingerprint"], {"output": None, "scores": {}}
+                )
+                entry["output"] = record["output"]
+                entry["scores"].update(record["scores"])
+
+    def lookup(self, fingerprint: str, scorer_names: list[str]) -> dict | None:
+        """Return the cached entry if it has a score for every scorer."""
+        entry = self.entries.get(fingerprint)
+        if entry is None or any(name not in entry["scores"] for name in scorer_names):
+            return None
+        return entry
+
+    def record(self, fingerprint: str, output: Any, scores: dict[str, Any]) -> None:
+        with self._lock:
+            entry = self.entries.setdefault(fingerprint, {"output": None, "scores": {}})
+            entry["output"] = output
+            entry["scores"].update(scores)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                record = {
+                    "fingerprint": fingerprint,
+                    "output": output,
+                    "scores": scores,
+                }
+                f.write(json.dumps(record) + "\n")
+
+    def build_data(
+        self, rows: Iterable[dict], context: str, scorers: list[Callable]
+    ) -> list[dict]:
+        """Turn dataset rows into eval cases marked with fingerprint and reuse.
+
+        When `rows` is a braintrust `Dataset`, each case keeps an `origin`
+        pointing back to its record.
+        """
+        scorer_names = [s.__name__ for s in scorers]
+        dataset_id = getattr(rows, "id", None)
+        data = []
+        for row in rows:
+            fingerprint = fingerprint_row(row["input"], row.get("expected"), context)
+            reused = self.lookup(fingerprint, scorer_names) is not None
+            case = {
+                "input": row["input"],
+                "expected": row.get("expected"),
+                "metadata": {
+                    **(row.get("metadata") or {}),
+                    "fingerprint": fingerprint,
+                    "reused": reused,
+                },
+                "tags": ["reused"] if reused else [],
+            }
+            origin = dataset_origin(dataset_id, row)
+            if origin is not None:
+                case["origin"] = origin
+            data.append(case)
+        return data
+
+    def wrap_task(self, task: Callable) -> Callable:
+        """Return cached outputs for reused rows and run `task` for the rest."""
+
+        async def incremental_task(input: Any, hooks) -> Any:
+            metadata = hooks.metadata
+            if metadata.get("reused"):
+                return self.entries[metadata["fingerprint"]]["output"]
+            return await task(input)
+
+        return incremental_task
+
+    def wrap_scorer(self, scorer: Callable) -> Callable:
+        """Return cached scores for reused rows and record fresh ones."""
+
+        def incremental_scorer(output: Any, metadata: dict | None = None) -> Any:
+            metadata = metadata or {}
+            fingerprint = metadata.get("fingerprint")
+            if metadata.get("reused"):
+                return _deserialize_score(
+                    self.entries[fingerprint]["scores"][scorer.__name__]
+                )
+
+            score = scorer(output)
+            if fingerprint is not None:
+                serialized = _serialize_score(scorer.__name__, score)
+                self.record(fingerprint, output, {scorer.__name__: serialized})
+            return score
+
+        # Keep the scorer name so reused and fresh scores land in the same column.
+        incremental_scorer.__name__ = scorer.__name__
+        return incremental_scorer
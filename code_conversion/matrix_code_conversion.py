@@ -0,0 +1,248 @@
+"""Evaluate code conversion across a matrix of models and prompt variants.
+
+Every (model, instructions) cell gets its own coding agent and its own
+experiment, but all cells share a single process: the dataset is loaded once,
+agent runs go through one shared rate limiter, and Ruff validation results are
+shared between cells so identical code is only checked once.
+
+Usage:
+    python -m code_conversion.matrix_code_conversion --models gpt-4o,gpt-4o-mini
+    python -m code_conversion.matrix_code_conversion \\
+        --models gpt-4o,gpt-4o-mini --instructions prompts/concise.txt
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from agents import Runner, function_tool, set_trace_processors
+from braintrust import EvalAsync, init_dataset
+from braintrust.wrappers.openai import BraintrustTracingProcessor
+from dotenv import load_dotenv
+
+from code_conversion.agents import INSTRUCTIONS, build_coding_agent, diagnostics_mode
+from code_conversion.incremental import dataset_origin
+from code_conversion.tools import (
+    CompactRuffOutput,
+    RuffOutput,
+    run_ruff,
+    run_ruff_compact,
+)
+
+load_dotenv()
+
+set_trace_processors([BraintrustTracingProcessor()])
+
+
+PROJECT_NAME = os.getenv("BRAINTRUST_PROJECT_NAME")
+DATASET_NAME = os.getenv("BRAINTRUST_DATASET_NAME")
+
+
+class RateLimiter:
+    """Bound concurrent agent runs and, optionally, how fast they start."""
+
+    def __init__(self, max_concurrency: int, requests_per_second: float = 0.0):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._interval = 1 / requests_per_second if requests_per_second else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        if self._interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self._interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc) -> None:
+        self._semaphore.release()
+
+
+class ValidationCache:
+    """Share Ruff results between cells, keyed by the checker and the code.
+
+    `diagnostics` selects what the agent's `check_python_code` tool returns,
+    mirroring `CHECK_PYTHON_CODE_DIAGNOSTICS`: raw Ruff output ("full") or
+    structured, deduplicated errors ("compact").
+    """
+
+    def __init__(self, diagnostics: str | None = None):
+        self.diagnostics = diagnostics or diagnostics_mode()
+        self._results: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, checker, input: str):
+        # The first caller for a key runs Ruff; concurrent callers for the same
+        # key wait on its future instead of running Ruff again.
+        key = (checker.__name__, input)
+        with self._lock:
+            future = self._results.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._results[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_owner:
+            try:
+                future.set_result(checker(input))
+            except BaseException as e:
+                # Don't cache failures; the next caller runs Ruff again
+                with self._lock:
+                    del self._results[key]
+                future.set_exception(e)
+                raise
+        return future.result()
+
+    def run_ruff(self, input: str) -> RuffOutput:
+        return self._cached(run_ruff, input)
+
+    def run_ruff_compact(self, input: str) -> CompactRuffOutput:
+        return self._cached(run_ruff_compact, input)
+
+    def check_python_code_tool(self):
+        if self.diagnostics == "compact":
+
+            @function_tool(name_override="check_python_code")
+            def check_python_code_compact(input: str) -> CompactRuffOutput:
+                return self.run_ruff_compact(input)
+
+            return check_python_code_compact
+
+        @function_tool(name_override="check_python_code")
+        def check_python_code(input: str) -> RuffOutput:
+            return self.run_ruff(input)
+
+        return check_python_code
+
+    def is_valid_python_scorer(self):
+        def is_valid_python(output: str) -> int:
+            return int(self.run_ruff(output).return_code == 0)
+
+        return is_valid_python
+
+
+def load_instruction_variants(paths: list[Path]) -> dict[str, str]:
+    variants = {"default": INSTRUCTIONS}
+    for path in paths:
+        variants[path.stem] = path.read_text()
+    return variants
+
+
+async def run_cell(
+    model: str,
+    variant: str,
+    instructions: str,
+    data: list[dict],
+    limiter: RateLimiter,
+    validation: ValidationCache,
+):
+    agent = build_coding_agent(
+        model, instructions, tools=[validation.check_python_code_tool()]
+    )
+
+    async def task(input: str) -> str:
+        async with limiter:
+            result = await Runner.run(agent, input)
+        return result.final_output
+
+    return await EvalAsync(
+        PROJECT_NAME,
+        data=data,
+        task=task,
+        scores=[validation.is_valid_python_scorer()],
+        experiment_name=f"Code Conversion [{model} / {variant}]",
+        metadata={
+            "model": model,
+            "instructions_variant": variant,
+            "diagnostics": validation.diagnostics,
+            "matrix": True,
+        },
+    )
+
+
+async def run_matrix(
+    models: list[str],
+    variants: dict[str, str],
+    max_concurrency: int,
+    requests_per_second: float,
+) -> None:
+    # Load the dataset once and share the rows between every cell. Each row
+    # keeps an origin so every cell's experiment links back to the dataset.
+    dataset = init_dataset(PROJECT_NAME, DATASET_NAME)
+    data = []
+    for row in dataset:
+        case = {"input": row["input"], "expected": row.get("expected")}
+        origin = dataset_origin(dataset.id, row)
+        if origin is not None:
+            case["origin"] = origin
+        data.append(case)
+    limiter = RateLimiter(max_concurrency, requests_per_second)
+    validation = ValidationCache()
+
+    cells = [(model, variant) for model in models for variant in variants]
+    print(f"Running {len(cells)} cells over {len(data)} rows")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            run_cell(model, variant, variants[variant], data, limiter, validation)
+            for model, variant in cells
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    for (model, variant), result in zip(cells, results, strict=True):
+        print(f"\n[{model} / {variant}]")
+        print(result.summary)
+    print(
+        f"\nMatrix finished in {elapsed:.2f}s; "
+        f"validation cache {validation.hits} hits / {validation.misses} misses"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a model x prompt eval matrix")
+    parser.add_argument(
+        "--models",
+        type=str,
+        default=os.getenv("OPENAI_MODEL_NAME", ""),
+        help="Comma separated model names",
+    )
+    parser.add_argument(
+        "--instructions",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Text files with INSTRUCTIONS variants (the default is always run)",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--requests-per-second", type=float, default=0.0)
+    args = parser.parse_args()
+
+    models = [model for model in args.models.split(",") if model]
+    if not models:
+        parser.error("at least one model is required")
+
+    asyncio.run(
+        run_matrix(
+            models,
+            load_instruction_variants(args.instructions),
+            args.max_concurrency,
+            args.requests_per_second,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
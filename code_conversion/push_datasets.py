@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -18,11 +19,16 @@ json_path = Path(__file__).parent / "data.json"
 with open(json_path, "r") as f:
     examples = json.load(f)
 
-# Insert each example into Braintrust
+# Insert each example into Braintrust. Ids are derived from the input and
+# expected output so re-running the push updates existing records instead of
+# duplicating them, while examples that share an input stay separate.
 for example in examples:
     id = dataset.insert(
         input=example["input"],
         expected=example["expected"],
+        id=hashlib.sha256(
+            json.dumps([example["input"], example["expected"]]).encode()
+        ).hexdigest(),
     )
     print(f"Inserted record with id {id}")
 
@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 import tempfile
@@ -14,7 +15,29 @@ class RuffOutput(BaseModel):
     stderr: str = Field(description="The standard error of the Ruff command.")
 
 
-def run_ruff(input: str) -> RuffOutput:
+class Diagnostic(BaseModel):
+    code: str = Field(description="The Ruff rule code, e.g. F821 or invalid-syntax.")
+    line: int = Field(description="The 1-based line of the error.")
+    column: int = Field(description="The 1-based column of the error.")
+    message: str = Field(description="A short description of the error.")
+    excerpt: str | None = Field(
+        default=None, description="The offending source line, if available."
+    )
+
+
+class CompactRuffOutput(BaseModel):
+    return_code: int = Field(
+        description="The return code of the Ruff command. 0 if successful, non-zero otherwise."
+    )
+    diagnostics: list[Diagnostic] = Field(
+        description="Deduplicated errors, ordered by position in the code."
+    )
+    omitted: int = Field(
+        default=0, description="Number of errors left out to stay within budget."
+    )
+
+
+def _ruff_check(input: str, *args: str) -> subprocess.CompletedProcess:
     # Write the code string to a temporary file
     with tempfile.NamedTemporaryFile(suffix=".py", mode="w+", delete=False) as tmp:
         tmp.write(input)
@@ -22,16 +45,91 @@ def run_ruff(input: str) -> RuffOutput:
         tmp_name = tmp.name
 
     # Run Ruff on the temporary file
-    result = subprocess.run(["ruff", "check", tmp_name], capture_output=True, text=True)
+    try:
+        return subprocess.run(
+            ["ruff", "check", *args, tmp_name],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    finally:
+        os.remove(tmp_name)
 
-    # Clean up the temporary file if desired
-    os.remove(tmp_name)
 
+def run_ruff(input: str) -> RuffOutput:
+    result = _ruff_check(input)
     return RuffOutput(
         return_code=result.returncode, stdout=result.stdout, stderr=result.stderr
     )
 
 
+def count_tokens(text: str) -> int:
+    # Rough approximation (4 characters per token), shared by the diagnostics
+    # budget and the benchmarks so both measure tokens the same way.
+    return max(1, len(text) // 4) if text else 0
+
+
+def run_ruff_compact(
+    input: str, max_tokens: int = 300, max_excerpt_chars: int = 80
+) -> CompactRuffOutput:
+    """Run Ruff and return structured, deduplicated diagnostics.
+
+    Unlike `run_ruff`, this drops temp-file paths, headers and help text.
+    Diagnostics that no longer fit in the remaining `max_tokens` budget are
+    left out and counted in `omitted`; smaller ones after them are still added.
+    """
+    result = _ruff_check(input, "--output-format", "json")
+
+    try:
+        # Ruff exits with 2 when it fails before linting (e.g. bad configuration)
+        messages = json.loads(result.stdout or "[]") if result.returncode < 2 else None
+    except json.JSONDecodeError:
+        messages = None
+    if messages is None:
+        messages = [
+            {
+                "code": "ruff-error",
+                "message": result.stderr.strip() or result.stdout.strip(),
+            }
+        ]
+
+    source_lines = input.splitlines()
+    diagnostics: list[Diagnostic] = []
+    seen = set()
+    budget = max_tokens
+    omitted = 0
+    for message in messages:
+        location = message.get("location") or {}
+        line = location.get("row", 0)
+        key = (message.get("code"), line, message.get("message"))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        excerpt = None
+        if 0 < line <= len(source_lines):
+            excerpt = source_lines[line - 1].strip()[:max_excerpt_chars] or None
+        diagnostic = Diagnostic(
+            # Older Ruff versions report syntax errors without a rule code
+            code=message.get("code") or "syntax-error",
+            line=line,
+            column=location.get("column", 0),
+            message=message.get("message", ""),
+            excerpt=excerpt,
+        )
+
+        cost = count_tokens(diagnostic.model_dump_json(exclude_none=True))
+        if cost > budget:
+            omitted += 1
+            continue
+        budget -= cost
+        diagnostics.append(diagnostic)
+
+    return CompactRuffOutput(
+        return_code=result.returncode, diagnostics=diagnostics, omitted=omitted
+    )
+
+
 def is_valid_python(output: str) -> int:
     ruff_output = run_ruff(output)
     return int(ruff_output.return_code == 0)
@@ -40,3 +138,8 @@ def is_valid_python(output: str) -> int:
 @function_tool
 def check_python_code(input: str) -> RuffOutput:
     return run_ruff(input)
+
+
+@function_tool(name_override="check_python_code")
+def check_python_code_compact(input: str) -> CompactRuffOutput:
+    return run_ruff_compact(input)
@@ -1,4 +1,5 @@
 import asyncio
+import gc
 import io
 import os
 import sys
@@ -9,7 +10,9 @@ from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from loguru import logger
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from phrase_cache import CachedPhraseProcessor, PhraseAudioCache
 from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import TTSSpeakFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -20,9 +23,19 @@ from pipecat.transports.services.daily import DailyParams, DailyTransport
 from pipecat.utils.tracing.setup import setup_tracing
 from pypdf import PdfReader
 from runner import configure
+from session_memory import SessionMemoryTracker
 
 load_dotenv()
 
+GREETING = "Hello! I'm ready to discuss the article with you. What would you like to learn about?"
+AUDIO_OUT_SAMPLE_RATE = 44100
+VOICE_ID = os.getenv("CARTESIA_VOICE_ID", "4d2fd738-3b3d-4368-957a-bb4805275bd9")
+# Shared by the live TTS service and the phrase cache so cached and live audio match
+CARTESIA_MODEL_ID = os.getenv("CARTESIA_MODEL_ID", "sonic-2")
+PHRASE_CACHE_DIR = os.getenv(
+    "PHRASE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".phrase_cache")
+)
+
 logger.remove(0)
 logger.add(sys.stderr, level="DEBUG")
 
@@ -49,52 +62,71 @@ def truncate_content(content, model_name):
 
 
 # Main function to extract content from url
-async def get_article_content(url: str, aiohttp_session: aiohttp.ClientSession):
+async def get_article_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
     if "arxiv.org" in url:
-        return await get_arxiv_content(url, aiohttp_session)
+        return await get_arxiv_content(url, aiohttp_session, memory)
     else:
-        return await get_wikipedia_content(url, aiohttp_session)
+        return await get_wikipedia_content(url, aiohttp_session, memory)
 
 
 # Helper function to extract content from Wikipedia url (this is
 # technically agnostic to URL type but will work best with Wikipedia
 # articles)
-async def get_wikipedia_content(url: str, aiohttp_session: aiohttp.ClientSession):
-    async with aiohttp_session.get(url) as response:
-        if response.status != 200:
-            return "Failed to download Wikipedia article."
+async def get_wikipedia_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
+    with memory.phase("fetch"):
+        async with aiohttp_session.get(url) as response:
+            if response.status != 200:
+                return "Failed to download Wikipedia article."
+
+            text = await response.text()
 
-        text = await response.text()
+    with memory.phase("parse"):
         soup = BeautifulSoup(text, "html.parser")
+        # Release the raw HTML and the parse tree as soon as the text is out
+        del text
 
         content = soup.find("div", {"class": "mw-parser-output"})
-
-        if content:
-            return content.get_text()
-        else:
-            return "Failed to extract Wikipedia article content."
+        extracted_text = content.get_text() if content else None
+        soup.decompose()
+        del soup, content
+        # The parse tree is cyclic, so it is only reclaimed by the collector
+        gc.collect()
+
+    if extracted_text:
+        return extracted_text
+    else:
+        return "Failed to extract Wikipedia article content."
 
 
 # Helper function to extract content from arXiv url
 
 
-async def get_arxiv_content(url: str, aiohttp_session: aiohttp.ClientSession):
+async def get_arxiv_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
     if "/abs/" in url:
         url = url.replace("/abs/", "/pdf/")
     if not url.endswith(".pdf"):
         url += ".pdf"
 
-    async with aiohttp_session.get(url) as response:
-        if response.status != 200:
-            return "Failed to download arXiv PDF."
+    with memory.phase("fetch"):
+        async with aiohttp_session.get(url) as response:
+            if response.status != 200:
+                return "Failed to download arXiv PDF."
+
+            content = await response.read()
 
-        content = await response.read()
-        pdf_file = io.BytesIO(content)
-        pdf_reader = PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+    with memory.phase("parse"):
+        pdf_reader = PdfReader(io.BytesIO(content))
+        # The reader keeps its own stream, so drop our reference to the bytes
+        del content
+        text = "".join(page.extract_text() for page in pdf_reader.pages)
+        del pdf_reader
+    return text
 
 
 # This is the main function that handles STT -> LLM -> TTS
@@ -103,93 +135,114 @@ async def get_arxiv_content(url: str, aiohttp_session: aiohttp.ClientSession):
 async def main():
     url = input("Enter the URL of the article you would like to talk about: ")
 
-    async with aiohttp.ClientSession() as session:
-        article_content = await get_article_content(url, session)
-        article_content = truncate_content(article_content, model_name="gpt-4o-mini")
-
-        (room_url, token) = await configure(session)
-
-        transport = DailyTransport(
-            room_url,
-            token,
-            "studypal",
-            DailyParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-                transcription_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
-            ),
-        )
-
-        tts = CartesiaTTSService(
-            api_key=os.getenv("CARTESIA_API_KEY"),
-            voice_id=os.getenv(
-                "CARTESIA_VOICE_ID", "4d2fd738-3b3d-4368-957a-bb4805275bd9"
-            ),
-            # British Narration Lady: 4d2fd738-3b3d-4368-957a-bb4805275bd9
-        )
-
-        llm = OpenAILLMService(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model="gpt-4o-mini",
-        )
-
-        messages = [
-            {
-                "role": "system",
-                "content": f"""You are an AI study partner. You have been given the following article content:
-
-{article_content}
-
-Your task is to help the user understand and learn from this article in 2 sentences. THESE RESPONSES SHOULD BE ONLY MAX 2 SENTENCES. THIS INSTRUCTION IS VERY IMPORTANT. RESPONSES SHOULDN'T BE LONG.
-""",
-            },
-        ]
-
-        context = OpenAILLMContext(messages)
-        context_aggregator = llm.create_context_aggregator(context)
-
-        pipeline = Pipeline(
-            [
-                transport.input(),
-                context_aggregator.user(),
-                llm,
-                tts,
-                transport.output(),
-                context_aggregator.assistant(),
-            ]
-        )
-
-        task = PipelineTask(
-            pipeline,
-            params=PipelineParams(
-                audio_out_sample_rate=44100,
-                allow_interruptions=True,
-                enable_metrics=True,
-                enable_usage_metrics=True,
-            ),
-            enable_tracing=True,
-            conversation_id="study-session-" + str(asyncio.get_event_loop().time()),
-        )
-
-        @transport.event_handler("on_first_participant_joined")
-        async def on_first_participant_joined(transport, participant):
-            await transport.capture_participant_transcription(participant["id"])
-            messages.append(
+    memory = SessionMemoryTracker(
+        trace_allocations=os.getenv("ENABLE_MEMORY_PROFILING", "").lower() == "true"
+    )
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            article_content = await get_article_content(url, session, memory)
+            with memory.phase("truncate"):
+                article_content = truncate_content(
+                    article_content, model_name="gpt-4o-mini"
+                )
+
+            # Fixed utterances are synthesized once and played from disk afterwards
+            phrase_cache = PhraseAudioCache(
+                PHRASE_CACHE_DIR, VOICE_ID, AUDIO_OUT_SAMPLE_RATE, CARTESIA_MODEL_ID
+            )
+            await phrase_cache.warm([GREETING], session)
+
+            (room_url, token) = await configure(session)
+
+            transport = DailyTransport(
+                room_url,
+                token,
+                "studypal",
+                DailyParams(
+                    audio_in_enabled=True,
+                    audio_out_enabled=True,
+                    transcription_enabled=True,
+                    vad_analyzer=SileroVADAnalyzer(),
+                ),
+            )
+
+            tts = CartesiaTTSService(
+                api_key=os.getenv("CARTESIA_API_KEY"),
+                voice_id=VOICE_ID,
+                model=CARTESIA_MODEL_ID,
+                # British Narration Lady: 4d2fd738-3b3d-4368-957a-bb4805275bd9
+            )
+
+            llm = OpenAILLMService(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                model="gpt-4o-mini",
+            )
+
+            messages = [
                 {
                     "role": "system",
-                    "content": "Hello! I'm ready to discuss the article with you. What would you like to learn about?",
-                }
+                    "content": f"""You are an AI study partner. You have been given the following article content:
+
+    {article_content}
+
+    Your task is to help the user understand and learn from this article in 2 sentences. THESE RESPONSES SHOULD BE ONLY MAX 2 SENTENCES. THIS INSTRUCTION IS VERY IMPORTANT. RESPONSES SHOULDN'T BE LONG.
+    """,
+                },
+            ]
+
+            context = OpenAILLMContext(messages)
+            context_aggregator = llm.create_context_aggregator(context)
+
+            pipeline = Pipeline(
+                [
+                    transport.input(),
+                    context_aggregator.user(),
+                    llm,
+                    CachedPhraseProcessor(phrase_cache),
+                    tts,
+                    transport.output(),
+                    context_aggregator.assistant(),
+                ]
             )
-            await task.queue_frames([context_aggregator.user().get_context_frame()])
 
-        @transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason):
-            await task.cancel()
+            task = PipelineTask(
+                pipeline,
+                params=PipelineParams(
+                    audio_out_sample_rate=AUDIO_OUT_SAMPLE_RATE,
+                    allow_interruptions=True,
+                    enable_metrics=True,
+                    enable_usage_metrics=True,
+                ),
+                enable_tracing=True,
+                conversation_id="study-session-" + str(asyncio.get_event_loop().time()),
+            )
+
+            @transport.event_handler("on_first_participant_joined")
+            async def on_first_participant_joined(transport, participant):
+                await transport.capture_participant_transcription(participant["id"])
+                # The greeting is always the same, so play it from the phrase cache
+                # instead of going through the LLM and TTS
+                messages.append({"role": "assistant", "content": GREETING})
+                await task.queue_frames([TTSSpeakFrame(GREETING)])
+
+            @transport.event_handler("on_participant_left")
+            async def on_participant_left(transport, participant, reason):
+                await task.cancel()
+
+            runner = PipelineRunner()
+
+            # The system prompt holds its own copy of the article
+            del article_content
 
-        runner = PipelineRunner()
+            with memory.phase("pipeline"):
+                await runner.run(task)
 
-        await runner.run(task)
+            logger.info(f"Phrase cache stats: {phrase_cache.stats()}")
+            phrase_cache.close()
+    finally:
+        memory.teardown()
+        logger.info(memory.report())
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import asyncio
+import gc
 import io
 import json
 import os
@@ -15,7 +16,9 @@ from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExport
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from phrase_cache import CachedPhraseProcessor, PhraseAudioCache
 from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import TTSSpeakFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -26,9 +29,19 @@ from pipecat.transports.services.daily import DailyParams, DailyTransport
 from pipecat.utils.tracing.setup import setup_tracing
 from pypdf import PdfReader
 from runner import configure
+from session_memory import SessionMemoryTracker
 
 load_dotenv()
 
+GREETING = "Hello! I'm ready to discuss the article with you. What would you like to learn about?"
+AUDIO_OUT_SAMPLE_RATE = 44100
+VOICE_ID = os.getenv("CARTESIA_VOICE_ID", "4d2fd738-3b3d-4368-957a-bb4805275bd9")
+# Shared by the live TTS service and the phrase cache so cached and live audio match
+CARTESIA_MODEL_ID = os.getenv("CARTESIA_MODEL_ID", "sonic-2")
+PHRASE_CACHE_DIR = os.getenv(
+    "PHRASE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".phrase_cache")
+)
+
 logger.remove(0)
 logger.add(sys.stderr, level="DEBUG")
 
@@ -96,7 +109,9 @@ def truncate_content(content, model_name):
         return result
 
 
-async def get_article_content(url: str, aiohttp_session: aiohttp.ClientSession):
+async def get_article_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
     """Extract content with manual tracing"""
     with manual_tracer.start_as_current_span("article_extraction") as span:
         span.set_attribute("url.full", url)
@@ -104,9 +119,9 @@ async def get_article_content(url: str, aiohttp_session: aiohttp.ClientSession):
 
         try:
             if "arxiv.org" in url:
-                result = await get_arxiv_content(url, aiohttp_session)
+                result = await get_arxiv_content(url, aiohttp_session, memory)
             else:
-                result = await get_wikipedia_content(url, aiohttp_session)
+                result = await get_wikipedia_content(url, aiohttp_session, memory)
 
             span.set_attribute("extraction.success", True)
             span.set_attribute("content.length", len(result))
@@ -119,36 +134,49 @@ async def get_article_content(url: str, aiohttp_session: aiohttp.ClientSession):
             raise
 
 
-async def get_wikipedia_content(url: str, aiohttp_session: aiohttp.ClientSession):
+async def get_wikipedia_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
     """Wikipedia extraction with detailed tracing"""
     with manual_tracer.start_as_current_span("wikipedia_extraction") as span:
         span.set_attribute("http.method", "GET")
         span.set_attribute("http.url", url)
 
-        async with aiohttp_session.get(url) as response:
-            span.set_attribute("http.status_code", response.status)
+        with memory.phase("fetch"):
+            async with aiohttp_session.get(url) as response:
+                span.set_attribute("http.status_code", response.status)
 
-            if response.status != 200:
-                span.set_attribute("extraction.error", "HTTP request failed")
-                return "Failed to download Wikipedia article."
+                if response.status != 200:
+                    span.set_attribute("extraction.error", "HTTP request failed")
+                    return "Failed to download Wikipedia article."
 
-            text = await response.text()
+                text = await response.text()
+
+        with memory.phase("parse"):
             soup = BeautifulSoup(text, "html.parser")
-            content = soup.find("div", {"class": "mw-parser-output"})
+            # Release the raw HTML and the parse tree as soon as the text is out
+            del text
 
-            if content:
-                extracted_text = content.get_text()
-                span.set_attribute(
-                    "extraction.paragraphs_found", len(soup.find_all("p"))
-                )
-                span.set_attribute("content.extracted_length", len(extracted_text))
-                return extracted_text
-            else:
-                span.set_attribute("extraction.error", "Content div not found")
-                return "Failed to extract Wikipedia article content."
+            content = soup.find("div", {"class": "mw-parser-output"})
+            extracted_text = content.get_text() if content else None
+            paragraphs_found = len(soup.find_all("p"))
+            soup.decompose()
+            del soup, content
+            # The parse tree is cyclic, so it is only reclaimed by the collector
+            gc.collect()
+
+        if extracted_text:
+            span.set_attribute("extraction.paragraphs_found", paragraphs_found)
+            span.set_attribute("content.extracted_length", len(extracted_text))
+            return extracted_text
+        else:
+            span.set_attribute("extraction.error", "Content div not found")
+            return "Failed to extract Wikipedia article content."
 
 
-async def get_arxiv_content(url: str, aiohttp_session: aiohttp.ClientSession):
+async def get_arxiv_content(
+    url: str, aiohttp_session: aiohttp.ClientSession, memory: SessionMemoryTracker
+):
     """ArXiv PDF extraction with detailed tracing"""
     with manual_tracer.start_as_current_span("arxiv_extraction") as span:
         # Convert abstract URL to PDF URL
@@ -160,29 +188,30 @@ async def get_arxiv_content(url: str, aiohttp_session: aiohttp.ClientSession):
         span.set_attribute("pdf.url", url)
         span.set_attribute("http.method", "GET")
 
-        async with aiohttp_session.get(url) as response:
-            span.set_attribute("http.status_code", response.status)
+        with memory.phase("fetch"):
+            async with aiohttp_session.get(url) as response:
+                span.set_attribute("http.status_code", response.status)
 
-            if response.status != 200:
-                span.set_attribute("extraction.error", "PDF download failed")
-                return "Failed to download arXiv PDF."
+                if response.status != 200:
+                    span.set_attribute("extraction.error", "PDF download failed")
+                    return "Failed to download arXiv PDF."
 
-            content = await response.read()
-            span.set_attribute("pdf.size_bytes", len(content))
+                content = await response.read()
+                span.set_attribute("pdf.size_bytes", len(content))
 
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PdfReader(pdf_file)
+        with memory.phase("parse"):
+            pdf_reader = PdfReader(io.BytesIO(content))
+            # The reader keeps its own stream, so drop our reference to the bytes
+            del content
 
             page_count = len(pdf_reader.pages)
             span.set_attribute("pdf.page_count", page_count)
 
-            text = ""
-            for i, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                text += page_text
+            text = "".join(page.extract_text() for page in pdf_reader.pages)
+            del pdf_reader
 
-            span.set_attribute("content.extracted_length", len(text))
-            return text
+        span.set_attribute("content.extracted_length", len(text))
+        return text
 
 
 def create_llm_span_attributes(
@@ -209,138 +238,171 @@ def create_llm_span_attributes(
 async def main():
     conversation_id = f"study-session-{int(asyncio.get_event_loop().time())}"
 
+    memory = SessionMemoryTracker(
+        trace_allocations=os.getenv("ENABLE_MEMORY_PROFILING", "").lower() == "true"
+    )
+
     with manual_tracer.start_as_current_span("study_session") as session_span:
         session_span.set_attribute("conversation.id", conversation_id)
         session_span.set_attribute("session.type", "interactive_study")
 
-        url = input("Enter the URL of the article you would like to talk about: ")
-        session_span.set_attribute("article.url", url)
-
-        async with aiohttp.ClientSession() as session:
-            # Extract and process article content
-            article_content = await get_article_content(url, session)
-            article_content = truncate_content(
-                article_content, model_name="gpt-4o-mini"
-            )
-
-            (room_url, token) = await configure(session)
-            session_span.set_attribute("daily.room_configured", True)
-
-            transport = DailyTransport(
-                room_url,
-                token,
-                "studypal",
-                DailyParams(
-                    audio_in_enabled=True,
-                    audio_out_enabled=True,
-                    transcription_enabled=True,
-                    vad_analyzer=SileroVADAnalyzer(),
-                ),
-            )
-
-            tts = CartesiaTTSService(
-                api_key=os.getenv("CARTESIA_API_KEY"),
-                voice_id=os.getenv(
-                    "CARTESIA_VOICE_ID", "4d2fd738-3b3d-4368-957a-bb4805275bd9"
-                ),
-            )
-
-            llm = OpenAILLMService(
-                api_key=os.getenv("OPENAI_API_KEY"),
-                model="gpt-4o-mini",
-            )
-
-            # Create system message with manual tracing
-            with manual_tracer.start_as_current_span(
-                "system_prompt_creation"
-            ) as prompt_span:
-                system_content = f"""You are an AI study partner. You have been given the following article content:
-
-{article_content}
-
-Your task is to help the user understand and learn from this article in 2 sentences. THESE RESPONSES SHOULD BE ONLY MAX 2 SENTENCES. THIS INSTRUCTION IS VERY IMPORTANT. RESPONSES SHOULDN'T BE LONG.
-"""
-
-                messages = [{"role": "system", "content": system_content}]
-
-                # Log system prompt details
-                prompt_span.set_attribute("prompt.type", "system")
-                prompt_span.set_attribute("prompt.character_count", len(system_content))
-                prompt_span.set_attribute(
-                    "article.character_count", len(article_content)
-                )
+        try:
+            url = input("Enter the URL of the article you would like to talk about: ")
+            session_span.set_attribute("article.url", url)
+
+            async with aiohttp.ClientSession() as session:
+                # Extract and process article content
+                article_content = await get_article_content(url, session, memory)
+                with memory.phase("truncate"):
+                    article_content = truncate_content(
+                        article_content, model_name="gpt-4o-mini"
+                    )
 
-            context = OpenAILLMContext(messages)
-            context_aggregator = llm.create_context_aggregator(context)
-
-            pipeline = Pipeline(
-                [
-                    transport.input(),
-                    context_aggregator.user(),
-                    llm,
-                    tts,
-                    transport.output(),
-                    context_aggregator.assistant(),
-                ]
-            )
-
-            task = PipelineTask(
-                pipeline,
-                params=PipelineParams(
-                    audio_out_sample_rate=44100,
-                    allow_interruptions=True,
-                    enable_metrics=True,
-                    enable_usage_metrics=True,
-                ),
-                enable_tracing=True,
-                conversation_id=conversation_id,
-            )
-
-            @transport.event_handler("on_first_participant_joined")
-            async def on_first_participant_joined(transport, participant):
-                with manual_tracer.start_as_current_span("participant_joined") as span:
-                    span.set_attribute("participant.id", participant["id"])
-                    span.set_attribute("event.type", "first_participant_joined")
-
-                    await transport.capture_participant_transcription(participant["id"])
-
-                    greeting_message = {
-                        "role": "assistant",
-                        "content": "Hello! I'm ready to discuss the article with you. What would you like to learn about?",
-                    }
-                    messages.append(greeting_message)
-
-                    # Log greeting with updated semantic conventions
-                    span.set_attributes(
-                        create_llm_span_attributes(
-                            messages=messages[-1:],
-                            model="gpt-4o-mini",
-                            response=greeting_message["content"],
-                        )
+                # Fixed utterances are synthesized once and played from disk afterwards
+                with manual_tracer.start_as_current_span("phrase_cache_warm") as span:
+                    phrase_cache = PhraseAudioCache(
+                        PHRASE_CACHE_DIR,
+                        VOICE_ID,
+                        AUDIO_OUT_SAMPLE_RATE,
+                        CARTESIA_MODEL_ID,
                     )
+                    await phrase_cache.warm([GREETING], session)
+                    span.set_attributes(phrase_cache.stats())
+
+                (room_url, token) = await configure(session)
+                session_span.set_attribute("daily.room_configured", True)
+
+                transport = DailyTransport(
+                    room_url,
+                    token,
+                    "studypal",
+                    DailyParams(
+                        audio_in_enabled=True,
+                        audio_out_enabled=True,
+                        transcription_enabled=True,
+                        vad_analyzer=SileroVADAnalyzer(),
+                    ),
+                )
 
-                    await task.queue_frames(
-                        [context_aggregator.user().get_context_frame()]
+                tts = CartesiaTTSService(
+                    api_key=os.getenv("CARTESIA_API_KEY"),
+                    voice_id=VOICE_ID,
+                    model=CARTESIA_MODEL_ID,
+                )
+
+                llm = OpenAILLMService(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    model="gpt-4o-mini",
+                )
+
+                # Create system message with manual tracing
+                with manual_tracer.start_as_current_span(
+                    "system_prompt_creation"
+                ) as prompt_span:
+                    system_content = f"""You are an AI study partner. You have been given the following article content:
+
+    {article_content}
+
+    Your task is to help the user understand and learn from this article in 2 sentences. THESE RESPONSES SHOULD BE ONLY MAX 2 SENTENCES. THIS INSTRUCTION IS VERY IMPORTANT. RESPONSES SHOULDN'T BE LONG.
+    """
+
+                    messages = [{"role": "system", "content": system_content}]
+
+                    # Log system prompt details
+                    prompt_span.set_attribute("prompt.type", "system")
+                    prompt_span.set_attribute(
+                        "prompt.character_count", len(system_content)
+                    )
+                    prompt_span.set_attribute(
+                        "article.character_count", len(article_content)
                     )
 
-            @transport.event_handler("on_participant_left")
-            async def on_participant_left(transport, participant, reason):
-                with manual_tracer.start_as_current_span("participant_left") as span:
-                    span.set_attribute("participant.id", participant["id"])
-                    span.set_attribute("event.type", "participant_left")
-                    span.set_attribute("leave.reason", reason)
+                context = OpenAILLMContext(messages)
+                context_aggregator = llm.create_context_aggregator(context)
+
+                pipeline = Pipeline(
+                    [
+                        transport.input(),
+                        context_aggregator.user(),
+                        llm,
+                        CachedPhraseProcessor(phrase_cache),
+                        tts,
+                        transport.output(),
+                        context_aggregator.assistant(),
+                    ]
+                )
 
-                    await task.cancel()
+                task = PipelineTask(
+                    pipeline,
+                    params=PipelineParams(
+                        audio_out_sample_rate=AUDIO_OUT_SAMPLE_RATE,
+                        allow_interruptions=True,
+                        enable_metrics=True,
+                        enable_usage_metrics=True,
+                    ),
+                    enable_tracing=True,
+                    conversation_id=conversation_id,
+                )
 
-            runner = PipelineRunner()
+                @transport.event_handler("on_first_participant_joined")
+                async def on_first_participant_joined(transport, participant):
+                    with manual_tracer.start_as_current_span(
+                        "participant_joined"
+                    ) as span:
+                        span.set_attribute("participant.id", participant["id"])
+                        span.set_attribute("event.type", "first_participant_joined")
 
-            # Final span before running
-            session_span.set_attribute("pipeline.configured", True)
-            session_span.set_attribute("services.llm", "openai-gpt-4o-mini")
-            session_span.set_attribute("services.tts", "cartesia")
-            session_span.set_attribute("services.transport", "daily")
+                        await transport.capture_participant_transcription(
+                            participant["id"]
+                        )
+
+                        greeting_message = {"role": "assistant", "content": GREETING}
+                        messages.append(greeting_message)
+
+                        # Log greeting with updated semantic conventions
+                        span.set_attributes(
+                            create_llm_span_attributes(
+                                messages=messages[-1:],
+                                model="gpt-4o-mini",
+                                response=greeting_message["content"],
+                            )
+                        )
 
-            await runner.run(task)
+                        # The greeting is always the same, so play it from the phrase
+                        # cache instead of going through the LLM and TTS
+                        await task.queue_frames([TTSSpeakFrame(GREETING)])
+
+                @transport.event_handler("on_participant_left")
+                async def on_participant_left(transport, participant, reason):
+                    with manual_tracer.start_as_current_span(
+                        "participant_left"
+                    ) as span:
+                        span.set_attribute("participant.id", participant["id"])
+                        span.set_attribute("event.type", "participant_left")
+                        span.set_attribute("leave.reason", reason)
+
+                        await task.cancel()
+
+                runner = PipelineRunner()
+
+                # Final span before running
+                session_span.set_attribute("pipeline.configured", True)
+                session_span.set_attribute("services.llm", "openai-gpt-4o-mini")
+                session_span.set_attribute("services.tts", "cartesia")
+                session_span.set_attribute("services.transport", "daily")
+
+                # The system prompt holds its own copy of the article
+                del article_content
+
+                with memory.phase("pipeline"):
+                    await runner.run(task)
+
+                session_span.set_attributes(phrase_cache.stats())
+                phrase_cache.close()
+        finally:
+            memory.teardown()
+            session_span.set_attributes(memory.span_attributes())
+            logger.info(memory.report())
 
 
 if __name__ == "__main__":
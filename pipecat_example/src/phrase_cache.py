@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import mmap
+import os
+from pathlib import Path
+
+import aiohttp
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+CARTESIA_TTS_URL = "https://api.cartesia.ai/tts/bytes"
+CARTESIA_VERSION = "2024-06-10"
+
+# 16-bit mono PCM
+SAMPLE_WIDTH = 2
+NUM_CHANNELS = 1
+
+
+class PhraseAudioCache:
+    """Pre-synthesized audio for fixed bot utterances.
+
+    Audio is stored as raw PCM on disk, keyed by text, model id, voice id and
+    sample rate, and memory-mapped when loaded so each session shares the same
+    pages.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        voice_id: str,
+        sample_rate: int,
+        model_id: str = "sonic-2",
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.voice_id = voice_id
+        self.sample_rate = sample_rate
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._audio: dict[str, mmap.mmap] = {}
+
+    def _path(self, text: str) -> Path:
+        key = hashlib.sha256(
+            f"{text}|{self.model_id}|{self.voice_id}|{self.sample_rate}".encode()
+        ).hexdigest()
+        return self.cache_dir / f"{key}.pcm"
+
+    def _load(self, text: str) -> bool:
+        path = self._path(text)
+        if not path.exists() or path.stat().st_size == 0:
+            return False
+        with open(path, "rb") as f:
+            self._audio[text] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    async def _synthesize(self, text: str, aiohttp_session: aiohttp.ClientSession):
+        async with aiohttp_session.post(
+            CARTESIA_TTS_URL,
+            headers={
+                "X-API-Key": os.getenv("CARTESIA_API_KEY", ""),
+                "Cartesia-Version": CARTESIA_VERSION,
+            },
+            json={
+                "model_id": self.model_id,
+                "transcript": text,
+                "voice": {"mode": "id", "id": self.voice_id},
+                "output_format": {
+                    "container": "raw",
+                    "encoding": "pcm_s16le",
+                    "sample_rate": self.sample_rate,
+                },
+            },
+        ) as response:
+            response.raise_for_status()
+            audio = await response.read()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a partially written file is never loaded
+        path = self._path(text)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(audio)
+        tmp_path.replace(path)
+
+    async def warm(self, phrases: list[str], aiohttp_session: aiohttp.ClientSession):
+        """Load cached phrases, synthesizing any that are missing on disk."""
+        for text in phrases:
+            if text in self._audio or self._load(text):
+                continue
+            try:
+                await self._synthesize(text, aiohttp_session)
+                self._load(text)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                # The cache is only an optimization: on request failures,
+                # timeouts or an unwritable cache dir the phrase falls back to
+                # live TTS
+                logger.warning(f"Failed to pre-synthesize phrase {text!r}: {e}")
+        logger.info(f"Phrase cache warmed with {len(self._audio)}/{len(phrases)}")
+
+    def get(self, text: str) -> mmap.mmap | None:
+        audio = self._audio.get(text)
+        if audio is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return audio
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "phrase_cache.size": len(self._audio),
+            "phrase_cache.hits": self.hits,
+            "phrase_cache.misses": self.misses,
+            "phrase_cache.hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        for audio in self._audio.values():
+            audio.close()
+        self._audio.clear()
+
+
+class CachedPhraseProcessor(FrameProcessor):
+    """Play cached audio for known `TTSSpeakFrame` utterances.
+
+    Placed between the LLM and TTS services. Known phrases are turned straight
+    into audio frames, so they skip both the LLM and live TTS; anything else is
+    passed through to the TTS service unchanged.
+    """
+
+    def __init__(self, cache: PhraseAudioCache, chunk_ms: int = 40, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        self._chunk_size = (
+            cache.sample_rate * chunk_ms // 1000 * SAMPLE_WIDTH * NUM_CHANNELS
+        )
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TTSSpeakFrame):
+            audio = self._cache.get(frame.text)
+            if audio is not None:
+                await self._play(audio)
+                return
+
+        await self.push_frame(frame, direction)
+
+    async def _play(self, audio: mmap.mmap):
+        await self.push_frame(TTSStartedFrame())
+        for start in range(0, len(audio), self._chunk_size):
+            await self.push_frame(
+                TTSAudioRawFrame(
+                    audio=audio[start : start + self._chunk_size],
+                    sample_rate=self._cache.sample_rate,
+                    num_channels=NUM_CHANNELS,
+                )
+            )
+        await self.push_frame(TTSStoppedFrame())
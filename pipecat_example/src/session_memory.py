@@ -0,0 +1,125 @@
+import gc
+import os
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where current isn't exposed)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class SessionMemoryTracker:
+    """Sample memory at session phases and attribute allocations to them.
+
+    RSS is always sampled. When `trace_allocations` is set, tracemalloc is used
+    to measure Python allocations per phase (delta and peak) and to report the
+    source lines that allocated the most during each phase. Tracing slows
+    allocation down noticeably, so it is opt-in.
+    """
+
+    def __init__(self, trace_allocations: bool = False, top_n: int = 5):
+        self.top_n = top_n
+        self.phases: dict[str, dict[str, Any]] = {}
+        self._started_tracing = False
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.baseline = self.sample()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def sample(self) -> dict[str, int]:
+        traced = tracemalloc.get_traced_memory()[0] if self.tracing else 0
+        return {"rss_bytes": current_rss_bytes(), "traced_bytes": traced}
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record memory growth and top allocation sites while the block runs.
+
+        Allocations made by other tasks running concurrently are attributed to
+        the phase too, so phases are best kept around sequential setup steps.
+        """
+        # Snapshot first: taking it allocates and can trigger garbage collection
+        snapshot = self._snapshot() if self.tracing else None
+        before = self.sample()
+        if snapshot is not None:
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            after = self.sample()
+            stats: dict[str, Any] = {
+                "rss_bytes": after["rss_bytes"],
+                "rss_delta_bytes": after["rss_bytes"] - before["rss_bytes"],
+            }
+            if snapshot is not None:
+                peak = tracemalloc.get_traced_memory()[1]
+                stats["traced_delta_bytes"] = (
+                    after["traced_bytes"] - before["traced_bytes"]
+                )
+                stats["traced_peak_bytes"] = peak - before["traced_bytes"]
+                stats["top_allocations"] = self._top_allocations(snapshot)
+            self.phases[name] = stats
+
+    def _top_allocations(self, before: tracemalloc.Snapshot) -> list[str]:
+        diffs = self._snapshot().compare_to(before, "lineno")
+        return [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+            f"+{stat.size_diff} B"
+            for stat in diffs[: self.top_n]
+            if stat.size_diff > 0
+        ]
+
+    def teardown(self):
+        """Collect garbage and record what the session left behind."""
+        gc.collect()
+        after = self.sample()
+        self.phases["teardown"] = {
+            "rss_bytes": after["rss_bytes"],
+            "retained_rss_bytes": after["rss_bytes"] - self.baseline["rss_bytes"],
+        }
+        if self.tracing:
+            self.phases["teardown"]["retained_traced_bytes"] = (
+                after["traced_bytes"] - self.baseline["traced_bytes"]
+            )
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def span_attributes(self) -> dict[str, Any]:
+        """Flatten phase stats into `memory.<phase>.<stat>` span attributes."""
+        attributes = {}
+        for phase, stats in self.phases.items():
+            for key, value in stats.items():
+                attributes[f"memory.{phase}.{key}"] = value
+        return attributes
+
+    def report(self) -> str:
+        lines = ["Session memory report:"]
+        for phase, stats in self.phases.items():
+            values = ", ".join(
+                f"{key}={value}"
+                for key, value in stats.items()
+                if key != "top_allocations"
+            )
+            lines.append(f"  {phase}: {values}")
+            for allocation in stats.get("top_allocations", []):
+                lines.append(f"    {allocation}")
+        return "\n".join(lines)
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from phrase_cache import CachedPhraseProcessor, PhraseAudioCache
+from pipecat.frames.frames import (
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+
+SAMPLE_RATE = 1000
+
+
+class _FakeResponse:
+    def __init__(self, audio: bytes):
+        self._audio = audio
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self) -> bytes:
+        return self._audio
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    """Stands in for aiohttp.ClientSession when synthesizing phrases."""
+
+    def __init__(self, audio: bytes = b"", error: Exception | None = None):
+        self._audio = audio
+        self._error = error
+        self.posts = 0
+
+    def post(self, url: str, **kwargs) -> _FakeResponse:
+        self.posts += 1
+        if self._error is not None:
+            raise self._error
+        return _FakeResponse(self._audio)
+
+
+def _cache(cache_dir, **overrides) -> PhraseAudioCache:
+    settings = {"voice_id": "voice", "sample_rate": SAMPLE_RATE, "model_id": "sonic-2"}
+    settings.update(overrides)
+    return PhraseAudioCache(str(cache_dir), **settings)
+
+
+def test_key_changes_with_text_model_voice_and_sample_rate(tmp_path):
+    path = _cache(tmp_path)._path("Hello")
+
+    assert _cache(tmp_path)._path("Hello") == path
+    assert _cache(tmp_path)._path("Goodbye") != path
+    assert _cache(tmp_path, model_id="sonic-english")._path("Hello") != path
+    assert _cache(tmp_path, voice_id="other")._path("Hello") != path
+    assert _cache(tmp_path, sample_rate=SAMPLE_RATE * 2)._path("Hello") != path
+
+
+def test_warm_loads_cached_audio_without_synthesizing(tmp_path):
+    cache = _cache(tmp_path)
+    cache._path("Hello").write_bytes(b"\x01\x02" * 10)
+    session = _FakeSession()
+
+    asyncio.run(cache.warm(["Hello"], session))
+
+    assert session.posts == 0
+    assert cache.get("Hello")[:] == b"\x01\x02" * 10
+    assert cache.get("Missing") is None
+    assert cache.stats()["phrase_cache.hits"] == 1
+    assert cache.stats()["phrase_cache.misses"] == 1
+    cache.close()
+
+
+def test_warm_synthesizes_missing_phrases_once(tmp_path):
+    cache = _cache(tmp_path / "cache")
+    session = _FakeSession(audio=b"\x00" * 8)
+
+    asyncio.run(cache.warm(["Hello"], session))
+    cache.close()
+    asyncio.run(_cache(tmp_path / "cache").warm(["Hello"], session))
+
+    assert session.posts == 1
+    assert cache._path("Hello").read_bytes() == b"\x00" * 8
+
+
+@pytest.mark.parametrize("error", [asyncio.TimeoutError(), OSError("disk full")])
+def test_warm_falls_back_to_live_tts_when_synthesis_fails(tmp_path, error):
+    cache = _cache(tmp_path)
+
+    asyncio.run(cache.warm(["Hello"], _FakeSession(error=error)))
+
+    assert cache.get("Hello") is None
+
+
+def test_warm_falls_back_when_cache_dir_is_not_writable(tmp_path):
+    # A cache dir below a regular file can't be created
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    cache = _cache(blocker / "cache")
+
+    asyncio.run(cache.warm(["Hello"], _FakeSession(audio=b"\x00" * 8)))
+
+    assert cache.get("Hello") is None
+
+
+def test_processor_plays_cached_phrases_in_chunks(tmp_path):
+    cache = _cache(tmp_path)
+    # 40 ms at 1 kHz, 16-bit mono = 80 bytes per chunk
+    cache._path("Hello").write_bytes(b"\x00" * 250)
+    cache._load("Hello")
+    processor = CachedPhraseProcessor(cache, chunk_ms=40)
+    pushed = []
+
+    async def push_frame(frame, direction=FrameDirection.DOWNSTREAM):
+        pushed.append(frame)
+
+    processor.push_frame = push_frame
+
+    async def run():
+        await processor.process_frame(TTSSpeakFrame("Hello"), FrameDirection.DOWNSTREAM)
+        await processor.process_frame(
+            TTSSpeakFrame("Not cached"), FrameDirection.DOWNSTREAM
+        )
+
+    asyncio.run(run())
+    cache.close()
+
+    assert isinstance(pushed[0], TTSStartedFrame)
+    audio_frames = pushed[1:-2]
+    assert all(isinstance(frame, TTSAudioRawFrame) for frame in audio_frames)
+    assert [len(frame.audio) for frame in audio_frames] == [80, 80, 80, 10]
+    assert all(frame.sample_rate == SAMPLE_RATE for frame in audio_frames)
+    assert isinstance(pushed[-2], TTSStoppedFrame)
+    # Unknown phrases are passed through to live TTS
+    assert isinstance(pushed[-1], TTSSpeakFrame)
+    assert pushed[-1].text == "Not cached"
@@ -0,0 +1,114 @@
+import asyncio
+import gc
+import tracemalloc
+
+# Import the pipeline before any test starts tracing: importing it under
+# tracemalloc is very slow.
+import app
+import pytest
+from session_memory import SessionMemoryTracker
+
+SOAK_ITERATIONS = 5
+TOLERANCE_BYTES = 256 * 1024
+
+
+class _MockResponse:
+    def __init__(self, body: bytes):
+        self.status = 200
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body.decode()
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _MockSession:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def get(self, url: str) -> _MockResponse:
+        return _MockResponse(self._body)
+
+
+class _OfflineEncoding:
+    """Byte-level stand-in for a tiktoken encoding (no download needed)."""
+
+    def encode(self, text: str) -> list[int]:
+        return list(text.encode())
+
+    def decode(self, tokens: list[int]) -> str:
+        return bytes(tokens).decode(errors="ignore")
+
+
+def _mock_article(paragraphs: int = 2000) -> bytes:
+    body = "".join(
+        f"<p>Paragraph {i} about photosynthesis and the light reactions.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        f'<html><body><div class="mw-parser-output">{body}</div></body></html>'.encode()
+    )
+
+
+async def _mock_session(session: _MockSession) -> SessionMemoryTracker:
+    memory = SessionMemoryTracker(trace_allocations=True)
+    content = await app.get_article_content(
+        "https://en.wikipedia.org/wiki/Photosynthesis", session, memory
+    )
+    with memory.phase("truncate"):
+        content = app.truncate_content(content, model_name="gpt-4o-mini")
+    messages = [{"role": "system", "content": content}]
+    del content, messages
+    memory.teardown()
+    return memory
+
+
+@pytest.fixture
+def offline_tokenizer(monkeypatch):
+    monkeypatch.setattr(
+        app.tiktoken, "encoding_for_model", lambda model_name: _OfflineEncoding()
+    )
+
+
+def test_tracker_records_phases_and_stops_its_tracing():
+    memory = SessionMemoryTracker(trace_allocations=True)
+    with memory.phase("allocate"):
+        data = [bytes(1024) for _ in range(100)]
+    memory.teardown()
+    del data
+
+    assert not tracemalloc.is_tracing()
+    stats = memory.phases["allocate"]
+    assert stats["traced_delta_bytes"] >= 100 * 1024
+    assert stats["traced_peak_bytes"] >= stats["traced_delta_bytes"]
+    assert stats["top_allocations"]
+    assert "retained_traced_bytes" in memory.phases["teardown"]
+    assert "memory.allocate.rss_bytes" in memory.span_attributes()
+
+
+def test_memory_returns_to_baseline_after_repeated_sessions(offline_tokenizer):
+    session = _MockSession(_mock_article())
+    tracemalloc.start()
+    try:
+        # Warm up lazily initialised state (parser caches) first
+        asyncio.run(_mock_session(session))
+        gc.collect()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        for _ in range(SOAK_ITERATIONS):
+            memory = asyncio.run(_mock_session(session))
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    assert set(memory.phases) >= {"fetch", "parse", "truncate", "teardown"}
+    assert growth < TOLERANCE_BYTES
@@ -0,0 +1,210 @@
+"""Push prompts, scorers and datasets for every cookbook in one command.
+
+Discovers `<cookbook>/push_{prompts,scorers,datasets}.py`, hashes each artifact
+(the push script, the cookbook modules it imports, the data files it reads and
+the environment variables it targets) and compares the hash with a local state
+file. Only artifacts whose hash changed are pushed, concurrently with a bounded
+pool of `braintrust push` processes.
+
+Usage:
+    python push_all.py
+    python push_all.py code_conversion --workers 8
+    python push_all.py --dry-run
+    python push_all.py --force
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).parent
+DEFAULT_STATE_PATH = ROOT / ".push_state.json"
+ARTIFACT_KINDS = ("prompts", "scorers", "datasets")
+# Environment variables that change where (or what) an artifact is pushed to
+TARGET_ENV_VARS = (
+    "BRAINTRUST_PROJECT_NAME",
+    "BRAINTRUST_DATASET_NAME",
+    "OPENAI_MODEL_NAME",
+)
+
+
+@dataclass
+class Artifact:
+    cookbook: str
+    kind: str
+    script: Path
+    digest: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.cookbook}/{self.kind}"
+
+
+@dataclass
+class PushResult:
+    artifact: Artifact
+    status: str
+    duration: float
+    output: str = ""
+
+
+def _local_imports(path: Path, cookbook: str) -> set[Path]:
+    """Return the cookbook modules imported by `path`, followed recursively."""
+    found: set[Path] = set()
+    pending = [path]
+    while pending:
+        tree = ast.parse(pending.pop().read_text())
+        for node in ast.walk(tree):
+            names = []
+            if isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module] + [f"{node.module}.{a.name}" for a in node.names]
+            elif isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+
+            for name in names:
+                if name.split(".")[0] != cookbook:
+                    continue
+                module_path = ROOT.joinpath(*name.split(".")).with_suffix(".py")
+                if module_path.exists() and module_path not in found:
+                    found.add(module_path)
+                    pending.append(module_path)
+    return found
+
+
+def _data_files(path: Path) -> set[Path]:
+    """Return files next to `path` whose name appears as a string in the script."""
+    tree = ast.parse(path.read_text())
+    names = {
+        node.value
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    }
+    return {
+        sibling
+        for sibling in path.parent.iterdir()
+        if sibling.is_file() and sibling.suffix != ".py" and sibling.name in names
+    }
+
+
+def hash_artifact(script: Path, cookbook: str) -> str:
+    digest = hashlib.sha256()
+    files = {script} | _local_imports(script, cookbook) | _data_files(script)
+    for file in sorted(files):
+        digest.update(str(file.relative_to(ROOT)).encode())
+        digest.update(file.read_bytes())
+    for name in TARGET_ENV_VARS:
+        digest.update(f"{name}={os.getenv(name, '')}".encode())
+    return digest.hexdigest()
+
+
+def discover_artifacts(cookbooks: list[str] | None = None) -> list[Artifact]:
+    artifacts = []
+    for kind in ARTIFACT_KINDS:
+        for script in sorted(ROOT.glob(f"*/push_{kind}.py")):
+            cookbook = script.parent.name
+            if cookbooks and cookbook not in cookbooks:
+                continue
+            artifacts.append(
+                Artifact(cookbook, kind, script, hash_artifact(script, cookbook))
+            )
+    return artifacts
+
+
+def load_state(path: Path) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_state(path: Path, state: dict[str, str]) -> None:
+    path.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
+
+
+def push_artifact(artifact: Artifact, if_exists: str) -> PushResult:
+    command = ["braintrust", "push", str(artifact.script.relative_to(ROOT))]
+    if artifact.kind != "datasets":
+        command += ["--if-exists", if_exists]
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    duration = time.perf_counter() - start
+
+    status = "pushed" if result.returncode == 0 else "failed"
+    return PushResult(artifact, status, duration, result.stdout + result.stderr)
+
+
+def print_summary(results: list[PushResult], wall_time: float) -> None:
+    print(f"\n{'Artifact':<36} {'Status':<10} {'Time (s)':>9}")
+    for result in sorted(results, key=lambda r: r.artifact.key):
+        print(f"{result.artifact.key:<36} {result.status:<10} {result.duration:>9.2f}")
+
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    totals = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    sequential = sum(result.duration for result in results)
+    print(f"\n{totals} in {wall_time:.2f}s (sequential push time {sequential:.2f}s)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Push changed cookbook artifacts")
+    parser.add_argument("cookbooks", nargs="*", help="Limit to these cookbooks")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE_PATH)
+    parser.add_argument("--force", action="store_true", help="Push everything")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--if-exists",
+        choices=["error", "replace", "ignore"],
+        default="replace",
+        help="What to do when a prompt or scorer already exists",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    start = time.perf_counter()
+    state = load_state(args.state)
+    artifacts = discover_artifacts(args.cookbooks)
+    changed = [a for a in artifacts if args.force or state.get(a.key) != a.digest]
+    results = [
+        PushResult(artifact, "unchanged", 0.0)
+        for artifact in artifacts
+        if artifact not in changed
+    ]
+
+    if args.dry_run:
+        results += [PushResult(artifact, "would push", 0.0) for artifact in changed]
+    elif changed:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            pushed = list(
+                pool.map(
+                    lambda artifact: push_artifact(artifact, args.if_exists), changed
+                )
+            )
+        for result in pushed:
+            if result.status == "pushed":
+                state[result.artifact.key] = result.artifact.digest
+            else:
+                print(f"\n{result.artifact.key} failed:\n{result.output}")
+        save_state(args.state, state)
+        results += pushed
+
+    print_summary(results, time.perf_counter() - start)
+    return int(any(result.status == "failed" for result in results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())